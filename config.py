@@ -29,3 +29,6 @@ CACHING_MIN_GET_SHARE = 0.8   # >= 80% GET
 CACHING_MAX_ERROR_RATE = 2.0  # < 2% error rate
 CACHING_MAX_CV = 0.5          # Coefficient of variation for "consistent" latency
 DEFAULT_CACHE_TTL_MINUTES = 15
+
+# ---- Parsing configuration ----
+TIMESTAMP_CACHE_SIZE = 65536  # Distinct timestamp strings memoized by parse_timestamp
@@ -5,9 +5,10 @@ Main serverless-style entry point for API log analysis.
 from __future__ import annotations
 
 from collections import Counter, defaultdict
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Any, Dict, Iterable, List, Optional
+from operator import itemgetter
+from typing import Any, DefaultDict, Dict, Iterable, List, Optional, Tuple
 
 from config import (
     CACHING_MAX_CV,
@@ -19,45 +20,52 @@ from config import (
     REQUEST_COST_USD,
 )
 from utils import (
+    _parse_timestamp_cached,
     coefficient_of_variation,
-    is_error_status,
+    format_timestamp,
     memory_cost_for_response_size,
     most_common_status,
-    parse_timestamp,
     severity_from_error_rate,
     severity_from_response_time,
 )
 
+# Fetches all required log fields in one call; raises KeyError if any is missing
+_required_fields = itemgetter("timestamp", "endpoint", "method", "response_time_ms", "status_code")
 
-@dataclass
+
+@dataclass(slots=True)
 class EndpointAccumulator:
     count: int = 0
     sum_resp: float = 0.0
-    sum_resp_sq: float = 0.0
+    mean_resp: float = 0.0  # Welford running mean
+    m2_resp: float = 0.0  # Welford running sum of squared deviations
     min_resp: Optional[float] = None
     max_resp: Optional[float] = None
     errors: int = 0
-    status_counts: Counter = None
-    method_counts: Counter = None
-
-    def __post_init__(self) -> None:
-        if self.status_counts is None:
-            self.status_counts = Counter()
-        if self.method_counts is None:
-            self.method_counts = Counter()
+    memory_cost: float = 0.0
+    get_count: int = 0  # Only GET traffic feeds the caching analysis
+    status_counts: Dict[int, int] = field(default_factory=dict)
 
     def update(
         self,
         response_time_ms: float,
         status_code: int,
-        method: str,
+        is_get: bool,
         is_error: bool,
+        memory_cost: float,
     ) -> None:
         self.count += 1
         self.sum_resp += response_time_ms
-        self.sum_resp_sq += response_time_ms * response_time_ms
-        self.status_counts[status_code] += 1
-        self.method_counts[method.upper()] += 1
+        self.memory_cost += memory_cost
+        # Welford update: numerically stable variance at high counts
+        delta = response_time_ms - self.mean_resp
+        self.mean_resp += delta / self.count
+        self.m2_resp += delta * (response_time_ms - self.mean_resp)
+        # Plain dict increments avoid Counter's per-call overhead
+        sc = self.status_counts
+        sc[status_code] = sc.get(status_code, 0) + 1
+        if is_get:
+            self.get_count += 1
 
         if self.min_resp is None or response_time_ms < self.min_resp:
             self.min_resp = response_time_ms
@@ -66,6 +74,46 @@ class EndpointAccumulator:
         if is_error:
             self.errors += 1
 
+    # Derived metrics. Each is read once per endpoint by the report loop, which
+    # keeps the result in a local, so they are computed on demand rather than
+    # memoized (a cache would need invalidating on every update()).
+
+    def avg_resp(self) -> float:
+        return self.sum_resp / self.count if self.count > 0 else 0.0
+
+    def err_rate_pct(self) -> float:
+        return (self.errors / self.count) * 100.0 if self.count > 0 else 0.0
+
+    def get_share(self) -> float:
+        return self.get_count / self.count if self.count > 0 else 0.0
+
+    def cv(self) -> float:
+        return coefficient_of_variation(self.mean_resp, self.m2_resp, self.count)
+
+
+def _caching_stats(acc: EndpointAccumulator, error_rate_pct: float) -> Optional[Tuple[float, float]]:
+    """
+    Check an endpoint against the caching heuristics.
+
+    Returns:
+        (get_share, cv) if the endpoint is a caching candidate, otherwise None.
+    """
+    if acc.count < CACHING_MIN_REQUESTS:
+        return None
+
+    get_share = acc.get_share()
+    if get_share < CACHING_MIN_GET_SHARE:
+        return None
+    if error_rate_pct >= CACHING_MAX_ERROR_RATE:
+        return None
+
+    cv = acc.cv()
+    if cv > CACHING_MAX_CV:
+        # Too variable to confidently cache
+        return None
+
+    return get_share, cv
+
 
 def analyze_api_logs(logs: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
     """
@@ -78,7 +126,7 @@ def analyze_api_logs(logs: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
             - method (str)
             - response_time_ms (int/float >= 0)
             - status_code (int)
-            - user_id (str, optional)
+            - user_id (str or other hashable ID, optional)
             - request_size_bytes (int/float >= 0, optional)
             - response_size_bytes (int/float >= 0, optional)
 
@@ -92,54 +140,48 @@ def analyze_api_logs(logs: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
     if not isinstance(logs, Iterable):
         raise TypeError("logs must be an iterable of dictionaries")
 
-    total_requests = 0
-    total_response_time = 0.0
-    total_errors = 0
     earliest_ts: Optional[datetime] = None
     latest_ts: Optional[datetime] = None
 
-    hourly_counts: Counter = Counter()
+    hourly_counts: List[int] = [0] * 24  # Indexed by UTC hour
     user_counts: Counter = Counter()
-    endpoint_acc: Dict[str, EndpointAccumulator] = {}
-
-    # Cost tracking
-    request_cost_total = 0.0
-    execution_cost_total = 0.0
-    memory_cost_total = 0.0
-    endpoint_costs: Dict[str, float] = defaultdict(float)
+    endpoint_acc: DefaultDict[str, EndpointAccumulator] = defaultdict(EndpointAccumulator)
 
     invalid_logs = 0
 
-    for log in logs:
-        if not isinstance(log, dict):
-            invalid_logs += 1
-            continue
+    # Bind hot globals/builtins to locals (LOAD_FAST instead of LOAD_GLOBAL)
+    _isinstance = isinstance
+    _float = float
+    _number = (int, float)
+    # timestamp_str is type-checked in the loop, so skip parse_timestamp's guard
+    _parse = _parse_timestamp_cached
+    _mem_cost = memory_cost_for_response_size
 
-        # Extract and validate fields
+    _required = _required_fields
+
+    for log in logs:
+        # Extract fields. Missing keys raise a LookupError (KeyError, or e.g.
+        # IndexError from a match object); non-mapping items raise TypeError
+        # (not subscriptable by str) or AttributeError (no .get).
         try:
-            timestamp_str = log["timestamp"]
-            endpoint = log["endpoint"]
-            method = log["method"]
-            response_time_ms = log["response_time_ms"]
-            status_code = log["status_code"]
-        except KeyError:
+            timestamp_str, endpoint, method, response_time_ms, status_code = _required(log)
+            user_id = log.get("user_id")
+            request_size_bytes = log.get("request_size_bytes", 0)
+            response_size_bytes = log.get("response_size_bytes", 0)
+        except (LookupError, TypeError, AttributeError):
             invalid_logs += 1
             continue
 
-        user_id = log.get("user_id")
-        request_size_bytes = log.get("request_size_bytes", 0)
-        response_size_bytes = log.get("response_size_bytes", 0)
-
         # Basic type checks
-        if not isinstance(timestamp_str, str) or not isinstance(endpoint, str) or not isinstance(method, str):
+        if not _isinstance(timestamp_str, str) or not _isinstance(endpoint, str) or not _isinstance(method, str):
             invalid_logs += 1
             continue
 
-        if not isinstance(response_time_ms, (int, float)) or not isinstance(status_code, int):
+        if not _isinstance(response_time_ms, _number) or not _isinstance(status_code, int):
             invalid_logs += 1
             continue
 
-        if not isinstance(request_size_bytes, (int, float)) or not isinstance(response_size_bytes, (int, float)):
+        if not _isinstance(request_size_bytes, _number) or not _isinstance(response_size_bytes, _number):
             invalid_logs += 1
             continue
 
@@ -148,100 +190,84 @@ def analyze_api_logs(logs: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
             continue
 
         # Parse timestamp
-        dt = parse_timestamp(timestamp_str)
+        dt = _parse(timestamp_str)
         if dt is None:
             invalid_logs += 1
             continue
 
         # ---- Valid log from here ----
-        total_requests += 1
-        total_response_time += float(response_time_ms)
-
         if earliest_ts is None or dt < earliest_ts:
             earliest_ts = dt
         if latest_ts is None or dt > latest_ts:
             latest_ts = dt
 
-        hour_label = dt.strftime("%H:00")
-        hourly_counts[hour_label] += 1
+        hourly_counts[dt.hour] += 1
 
-        if isinstance(user_id, str):
-            user_counts[user_id] += 1
+        # user_id is normally a str; any hashable ID is counted as-is
+        if user_id is not None:
+            try:
+                user_counts[user_id] += 1
+            except TypeError:
+                pass  # Unhashable ID (list/dict): not attributable to a user
 
-        error_flag = is_error_status(status_code)
-        if error_flag:
-            total_errors += 1
+        # Inlined utils.is_error_status: status_code is already known to be an int
+        error_flag = 400 <= status_code <= 599
 
         # Endpoint accumulators
-        acc = endpoint_acc.get(endpoint)
-        if acc is None:
-            acc = EndpointAccumulator()
-            endpoint_acc[endpoint] = acc
-
-        acc.update(
-            response_time_ms=float(response_time_ms),
+        endpoint_acc[endpoint].update(
+            response_time_ms=_float(response_time_ms),
             status_code=status_code,
-            method=method,
+            is_get=method.upper() == "GET",
             is_error=error_flag,
+            memory_cost=_mem_cost(_float(response_size_bytes)),
         )
 
-        # Cost accumulations
-        request_cost = REQUEST_COST_USD
-        execution_cost = float(response_time_ms) * EXECUTION_COST_PER_MS_USD
-        memory_cost = memory_cost_for_response_size(float(response_size_bytes))
-
-        request_cost_total += request_cost
-        execution_cost_total += execution_cost
-        memory_cost_total += memory_cost
-
-        endpoint_costs[endpoint] += request_cost + execution_cost + memory_cost
-
-    # ---- Build outputs ----
-
-    # Summary
-    if total_requests > 0:
-        avg_response_time_ms = total_response_time / total_requests
-        error_rate_pct = (total_errors / total_requests) * 100.0
-    else:
-        avg_response_time_ms = 0.0
-        error_rate_pct = 0.0
-
-    if earliest_ts is not None:
-        start_str = earliest_ts.isoformat().replace("+00:00", "Z")
-        end_str = latest_ts.isoformat().replace("+00:00", "Z")
-        time_range = {"start": start_str, "end": end_str}
-    else:
-        time_range = None
-
-    summary = {
-        "total_requests": total_requests,
-        "time_range": time_range,
-        "avg_response_time_ms": avg_response_time_ms,
-        "error_rate_percentage": error_rate_pct,
-    }
+    # ---- Single pass over endpoints ----
+    # Totals, endpoint stats, performance issues, per-endpoint cost and caching
+    # opportunities all read the same accumulator fields, so they are built
+    # together, and recommendation strings are formatted as issues and caching
+    # candidates are found. Request and execution costs are linear in
+    # count / response time, so they are derived from the endpoint sums
+    # rather than per log.
+    total_requests = 0
+    total_response_time = 0.0
+    total_errors = 0
+    memory_cost_total = 0.0
 
-    # Endpoint stats & performance issues
     endpoint_stats: List[Dict[str, Any]] = []
     performance_issues: List[Dict[str, Any]] = []
+    cost_by_endpoint: List[Dict[str, Any]] = []
 
+    caching_opportunities: List[Dict[str, Any]] = []
+    # (estimated savings, text) so they can be ordered like caching_opportunities
+    caching_recommendations: List[Tuple[float, str]] = []
+    issue_recommendations: List[str] = []
+    total_requests_eliminated = 0
+    total_cost_savings = 0.0
+    total_performance_improvement_ms = 0.0
+
+    # Accumulators are only created by update(), so every count is >= 1
     for endpoint, acc in endpoint_acc.items():
-        if acc.count > 0:
-            ep_avg_resp = acc.sum_resp / acc.count
-            ep_error_rate_pct = (acc.errors / acc.count) * 100.0 if acc.count > 0 else 0.0
-        else:
-            ep_avg_resp = 0.0
-            ep_error_rate_pct = 0.0
-
-        ep_stat = {
-            "endpoint": endpoint,
-            "request_count": acc.count,
-            "avg_response_time_ms": ep_avg_resp,
-            "slowest_request_ms": acc.max_resp,
-            "fastest_request_ms": acc.min_resp,
-            "error_count": acc.errors,
-            "most_common_status": most_common_status(acc.status_counts),
-        }
-        endpoint_stats.append(ep_stat)
+        ep_count = acc.count
+        ep_avg_resp = acc.avg_resp()
+        ep_error_rate_pct = acc.err_rate_pct()
+
+        total_requests += ep_count
+        total_response_time += acc.sum_resp
+        total_errors += acc.errors
+        memory_cost_total += acc.memory_cost
+
+        endpoint_stats.append(
+            {
+                "endpoint": endpoint,
+                "request_count": ep_count,
+                "avg_response_time_ms": ep_avg_resp,
+                "slowest_request_ms": acc.max_resp,
+                "fastest_request_ms": acc.min_resp,
+                "error_count": acc.errors,
+                "most_common_status": most_common_status(acc.status_counts),
+            }
+        )
 
         # Performance issues: latency-based
         severity, threshold_ms = severity_from_response_time(ep_avg_resp)
@@ -255,6 +281,10 @@ def analyze_api_logs(logs: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
                     "severity": severity,
                 }
             )
+            issue_recommendations.append(
+                f"Investigate {endpoint} performance "
+                f"(avg {ep_avg_resp:.0f}ms exceeds {threshold_ms}ms threshold)"
+            )
 
         # Performance issues: error-rate-based
         err_sev = severity_from_error_rate(ep_error_rate_pct)
@@ -267,131 +297,121 @@ def analyze_api_logs(logs: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
                     "severity": err_sev,
                 }
             )
+            issue_recommendations.append(
+                f"Alert: {endpoint} has {ep_error_rate_pct:.1f}% error rate"
+            )
 
-    # Sort endpoint stats for deterministic output (by endpoint name)
-    endpoint_stats.sort(key=lambda e: e["endpoint"])
-
-    # Hourly distribution (sorted by hour)
-    hourly_distribution = {hour: hourly_counts[hour] for hour in sorted(hourly_counts.keys())}
-
-    # Top users
-    top_users_by_requests = [
-        {"user_id": user_id, "request_count": count}
-        for user_id, count in user_counts.most_common(5)
-    ]
-
-    # ---- Cost analysis (Option A) ----
-    total_cost = request_cost_total + execution_cost_total + memory_cost_total
-
-    cost_by_endpoint: List[Dict[str, Any]] = []
-    for endpoint, total_ep_cost in endpoint_costs.items():
-        ep_count = endpoint_acc[endpoint].count
+        # Cost analysis (Option A)
+        ep_total_cost = (
+            ep_count * REQUEST_COST_USD
+            + acc.sum_resp * EXECUTION_COST_PER_MS_USD
+            + acc.memory_cost
+        )
+        ep_cost_per_request = ep_total_cost / ep_count
         cost_by_endpoint.append(
             {
                 "endpoint": endpoint,
-                "total_cost": total_ep_cost,
-                "cost_per_request": (total_ep_cost / ep_count) if ep_count > 0 else 0.0,
+                "total_cost": ep_total_cost,
+                "cost_per_request": ep_cost_per_request,
             }
         )
 
-    cost_analysis = {
-        "total_cost_usd": total_cost,
-        "cost_breakdown": {
-            "request_costs": request_cost_total,
-            "execution_costs": execution_cost_total,
-            "memory_costs": memory_cost_total,
-        },
-        "cost_by_endpoint": cost_by_endpoint,
-        # Filled/adjusted after caching analysis:
-        "optimization_potential_usd": 0.0,
-    }
+        # Caching opportunities (Option D)
+        caching_stats = _caching_stats(acc, ep_error_rate_pct)
+        if caching_stats is not None:
+            get_share, cv = caching_stats
 
-    # ---- Caching opportunities (Option D) ----
-    caching_opportunities: List[Dict[str, Any]] = []
-    total_requests_eliminated = 0
-    total_cost_savings = 0.0
-    total_performance_improvement_ms = 0.0
+            # Potential cache behavior (heuristic):
+            potential_cache_hit_rate = int(round(get_share * 100))
+            potential_requests_saved = int(round(ep_count * (potential_cache_hit_rate / 100.0)))
+            estimated_cost_savings = potential_requests_saved * ep_cost_per_request
 
-    for endpoint, acc in endpoint_acc.items():
-        if acc.count < CACHING_MIN_REQUESTS:
-            continue
+            caching_opportunities.append(
+                {
+                    "endpoint": endpoint,
+                    "potential_cache_hit_rate": potential_cache_hit_rate,
+                    "current_requests": ep_count,
+                    "potential_requests_saved": potential_requests_saved,
+                    "estimated_cost_savings_usd": estimated_cost_savings,
+                    "recommended_ttl_minutes": DEFAULT_CACHE_TTL_MINUTES,
+                    "recommendation_confidence": "high" if cv < (CACHING_MAX_CV / 2) else "medium",
+                }
+            )
+            caching_recommendations.append(
+                (
+                    estimated_cost_savings,
+                    f"Consider caching for {endpoint} "
+                    f"({ep_count} requests, {potential_cache_hit_rate}% cache-hit potential)",
+                )
+            )
 
-        get_count = acc.method_counts.get("GET", 0)
-        get_share = get_count / acc.count if acc.count > 0 else 0.0
-        error_rate_pct = (acc.errors / acc.count) * 100.0 if acc.count > 0 else 0.0
+            total_requests_eliminated += potential_requests_saved
+            total_cost_savings += estimated_cost_savings
+            total_performance_improvement_ms += potential_requests_saved * ep_avg_resp
 
-        if get_share < CACHING_MIN_GET_SHARE:
-            continue
-        if error_rate_pct >= CACHING_MAX_ERROR_RATE:
-            continue
+    request_cost_total = total_requests * REQUEST_COST_USD
+    execution_cost_total = total_response_time * EXECUTION_COST_PER_MS_USD
 
-        cv = coefficient_of_variation(acc.sum_resp, acc.sum_resp_sq, acc.count)
-        if cv > CACHING_MAX_CV:
-            # Too variable to confidently cache
-            continue
+    # ---- Build outputs ----
 
-        ep_avg_resp = acc.sum_resp / acc.count if acc.count > 0 else 0.0
+    # Summary
+    if total_requests > 0:
+        avg_response_time_ms = total_response_time / total_requests
+        error_rate_pct = (total_errors / total_requests) * 100.0
+    else:
+        avg_response_time_ms = 0.0
+        error_rate_pct = 0.0
 
-        # Potential cache behavior (heuristic):
-        potential_cache_hit_rate = int(round(get_share * 100))
-        potential_requests_saved = int(round(acc.count * (potential_cache_hit_rate / 100.0)))
+    if earliest_ts is not None:
+        time_range = {"start": format_timestamp(earliest_ts), "end": format_timestamp(latest_ts)}
+    else:
+        time_range = None
 
-        ep_total_cost = endpoint_costs.get(endpoint, 0.0)
-        ep_cost_per_request = ep_total_cost / acc.count if acc.count > 0 else 0.0
-        estimated_cost_savings = potential_requests_saved * ep_cost_per_request
+    summary = {
+        "total_requests": total_requests,
+        "time_range": time_range,
+        "avg_response_time_ms": avg_response_time_ms,
+        "error_rate_percentage": error_rate_pct,
+    }
 
-        caching_opportunities.append(
-            {
-                "endpoint": endpoint,
-                "potential_cache_hit_rate": potential_cache_hit_rate,
-                "current_requests": acc.count,
-                "potential_requests_saved": potential_requests_saved,
-                "estimated_cost_savings_usd": estimated_cost_savings,
-                "recommended_ttl_minutes": DEFAULT_CACHE_TTL_MINUTES,
-                "recommendation_confidence": "high" if cv < (CACHING_MAX_CV / 2) else "medium",
-            }
-        )
+    # Sort endpoint stats for deterministic output (by endpoint name)
+    endpoint_stats.sort(key=lambda e: e["endpoint"])
 
-        total_requests_eliminated += potential_requests_saved
-        total_cost_savings += estimated_cost_savings
-        total_performance_improvement_ms += potential_requests_saved * ep_avg_resp
+    # Hourly distribution (sorted by hour, only hours with traffic)
+    hourly_distribution = {
+        f"{hour:02d}:00": count for hour, count in enumerate(hourly_counts) if count
+    }
 
-    caching_opportunities.sort(key=lambda c: c["estimated_cost_savings_usd"], reverse=True)
+    # Top users
+    top_users_by_requests = [
+        {"user_id": user_id, "request_count": count}
+        for user_id, count in user_counts.most_common(5)
+    ]
 
-    caching_summary = {
-        "caching_opportunities": caching_opportunities,
-        "total_potential_savings": {
-            "requests_eliminated": total_requests_eliminated,
-            "cost_savings_usd": total_cost_savings,
-            "performance_improvement_ms": total_performance_improvement_ms,
+    cost_analysis = {
+        "total_cost_usd": request_cost_total + execution_cost_total + memory_cost_total,
+        "cost_breakdown": {
+            "request_costs": request_cost_total,
+            "execution_costs": execution_cost_total,
+            "memory_costs": memory_cost_total,
         },
+        "cost_by_endpoint": cost_by_endpoint,
+        "optimization_potential_usd": total_cost_savings,
     }
 
-    # Now we can set optimization_potential_usd based on caching analysis
-    cost_analysis["optimization_potential_usd"] = total_cost_savings
-
-    # ---- Recommendations ----
-    recommendations: List[str] = []
+    # Both lists share the same order and keys; the stable sort keeps them aligned
+    caching_opportunities.sort(key=lambda c: c["estimated_cost_savings_usd"], reverse=True)
+    caching_recommendations.sort(key=lambda r: r[0], reverse=True)
 
-    # From caching opportunities
-    for c in caching_opportunities:
-        recommendations.append(
-            f"Consider caching for {c['endpoint']} "
-            f"({c['current_requests']} requests, {c['potential_cache_hit_rate']}% cache-hit potential)"
-        )
+    total_potential_savings = {
+        "requests_eliminated": total_requests_eliminated,
+        "cost_savings_usd": total_cost_savings,
+        "performance_improvement_ms": total_performance_improvement_ms,
+    }
 
-    # From performance issues
-    for issue in performance_issues:
-        if issue["type"] == "slow_endpoint":
-            recommendations.append(
-                f"Investigate {issue['endpoint']} performance "
-                f"(avg {issue['avg_response_time_ms']:.0f}ms exceeds {issue['threshold_ms']}ms threshold)"
-            )
-        elif issue["type"] == "high_error_rate":
-            recommendations.append(
-                f"Alert: {issue['endpoint']} has "
-                f"{issue['error_rate_percentage']:.1f}% error rate"
-            )
+    # Recommendations: caching first (by savings), then performance issues
+    recommendations: List[str] = [text for _, text in caching_recommendations]
+    recommendations.extend(issue_recommendations)
 
     result: Dict[str, Any] = {
         "summary": summary,
@@ -401,8 +421,8 @@ def analyze_api_logs(logs: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
         "hourly_distribution": hourly_distribution,
         "top_users_by_requests": top_users_by_requests,
         "cost_analysis": cost_analysis,
-        "caching_opportunities": caching_summary["caching_opportunities"],
-        "total_potential_savings": caching_summary["total_potential_savings"],
+        "caching_opportunities": caching_opportunities,
+        "total_potential_savings": total_potential_savings,
         "meta": {
             "invalid_logs": invalid_logs,
         },
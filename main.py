@@ -1,9 +1,9 @@
 from function import analyze_api_logs
+from utils import load_logs
 
 def run():
     import json
-    with open("tests/test_data/sample_small.json") as f:
-        logs = json.load(f)
+    logs = load_logs("tests/test_data/sample_small.json")
     result = analyze_api_logs(logs)
     print(json.dumps(result, indent=2))
 
@@ -1,8 +1,19 @@
+import re
 import time
 
 import pytest
 
-from function import analyze_api_logs
+from function import EndpointAccumulator, analyze_api_logs
+from config import (
+    MEMORY_COST_LARGE_USD,
+    MEMORY_COST_MEDIUM_USD,
+    MEMORY_COST_SMALL_USD,
+    MEDIUM_RESPONSE_BYTES,
+    SMALL_RESPONSE_BYTES,
+    SLOW_HIGH_THRESHOLD_MS,
+    SLOW_MEDIUM_THRESHOLD_MS,
+)
+from utils import memory_cost_for_response_size, parse_timestamp, severity_from_response_time
 
 
 def test_invalid_types():
@@ -53,9 +64,94 @@ def test_performance_large_dataset():
             }
         )
 
+    parse_timestamp.cache_clear()
     start = time.perf_counter()
     result = analyze_api_logs(logs)
     elapsed = time.perf_counter() - start
 
     assert result["summary"]["total_requests"] == 20000
     assert elapsed < 2.0  # under 2 seconds
+
+    # Only 60 distinct timestamps: everything else should be a cache hit
+    info = parse_timestamp.cache_info()
+    assert info.misses == 60
+    assert info.hits == 20000 - 60
+
+
+def test_timestamp_offsets_normalized_to_utc():
+    logs = [
+        {
+            "timestamp": "2025-01-15T12:30:00+02:00",
+            "endpoint": "/api/tz",
+            "method": "GET",
+            "response_time_ms": 10,
+            "status_code": 200,
+        }
+    ]
+    result = analyze_api_logs(logs)
+    assert result["summary"]["time_range"]["start"] == "2025-01-15T10:30:00Z"
+    assert result["hourly_distribution"] == {"10:00": 1}
+
+
+def test_threshold_boundaries_are_inclusive():
+    assert memory_cost_for_response_size(-1) == 0.0
+    assert memory_cost_for_response_size(SMALL_RESPONSE_BYTES) == MEMORY_COST_SMALL_USD
+    assert memory_cost_for_response_size(SMALL_RESPONSE_BYTES + 1) == MEMORY_COST_MEDIUM_USD
+    assert memory_cost_for_response_size(MEDIUM_RESPONSE_BYTES) == MEMORY_COST_MEDIUM_USD
+    assert memory_cost_for_response_size(MEDIUM_RESPONSE_BYTES + 1) == MEMORY_COST_LARGE_USD
+
+    assert severity_from_response_time(SLOW_MEDIUM_THRESHOLD_MS) == (None, None)
+    assert severity_from_response_time(SLOW_HIGH_THRESHOLD_MS) == ("medium", SLOW_MEDIUM_THRESHOLD_MS)
+    assert severity_from_response_time(SLOW_HIGH_THRESHOLD_MS + 1) == ("high", SLOW_MEDIUM_THRESHOLD_MS)
+
+
+def test_non_dict_items_counted_invalid():
+    logs = [
+        None,
+        42,
+        "2025-01-15T10:30:00Z",
+        ["timestamp", "endpoint"],
+        re.match("a", "a"),  # __getitem__ raises IndexError
+        {
+            "timestamp": "2025-01-15T10:30:00Z",
+            "endpoint": "/api/ok",
+            "method": "GET",
+            "response_time_ms": 10,
+            "status_code": 200,
+        },
+    ]
+    result = analyze_api_logs(logs)
+    assert result["summary"]["total_requests"] == 1
+    assert result["meta"]["invalid_logs"] == 5
+
+
+def test_latency_variance_is_numerically_stable():
+    # Large offset with tiny spread: the E[X^2] - E[X]^2 form cancels to garbage here
+    acc = EndpointAccumulator()
+    for i in range(30000):
+        acc.update(1e9 + (i % 3), 200, is_get=True, is_error=False, memory_cost=0.0)
+
+    expected_std = (2 / 3) ** 0.5
+    assert acc.cv() == pytest.approx(expected_std / (1e9 + 1), rel=1e-6)
+
+
+def test_nan_values_keep_top_severity_and_cost():
+    # NaN passes the "< 0" validation; it must not fall into the lowest bucket
+    nan = float("nan")
+    assert memory_cost_for_response_size(nan) == MEMORY_COST_LARGE_USD
+    assert severity_from_response_time(nan) == ("critical", SLOW_MEDIUM_THRESHOLD_MS)
+
+    logs = [
+        {
+            "timestamp": "2025-01-15T10:30:00Z",
+            "endpoint": "/api/nan",
+            "method": "GET",
+            "response_time_ms": nan,
+            "status_code": 200,
+            "response_size_bytes": nan,
+        }
+    ]
+    result = analyze_api_logs(logs)
+    assert result["cost_analysis"]["cost_breakdown"]["memory_costs"] == MEMORY_COST_LARGE_USD
+    issue = next(i for i in result["performance_issues"] if i["type"] == "slow_endpoint")
+    assert issue["severity"] == "critical"
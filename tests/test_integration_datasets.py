@@ -1,14 +1,12 @@
-import json
 from function import analyze_api_logs
+from utils import load_logs
 
 def test_medium_json_loads():
-    with open("tests/test_data/sample_medium.json") as f: #300 requests in sample_medium.json 
-        logs = json.load(f)
+    logs = load_logs("tests/test_data/sample_medium.json") #300 requests in sample_medium.json
     result = analyze_api_logs(logs)
     assert result["summary"]["total_requests"] > 0
 
 def test_large_json_loads():
-    with open("tests/test_data/sample_large.json") as f: #12000 requests in sample_large.json
-        logs = json.load(f)
+    logs = load_logs("tests/test_data/sample_large.json") #12000 requests in sample_large.json
     result = analyze_api_logs(logs)
     assert result["summary"]["total_requests"] > 0
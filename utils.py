@@ -4,10 +4,11 @@ Utility helpers for API log analysis.
 
 from __future__ import annotations
 
-from collections import Counter
+from bisect import bisect_left
 from datetime import datetime, timezone
-from math import sqrt
-from typing import Any, Dict, Optional, Tuple
+from functools import lru_cache
+from math import isnan, sqrt
+from typing import Any, Dict, List, Optional, Tuple
 
 from config import (
     ERROR_RATE_CRITICAL_THRESHOLD,
@@ -21,37 +22,124 @@ from config import (
     SLOW_CRITICAL_THRESHOLD_MS,
     SLOW_HIGH_THRESHOLD_MS,
     SLOW_MEDIUM_THRESHOLD_MS,
+    TIMESTAMP_CACHE_SIZE,
 )
 
+try:
+    import ciso8601
+except ImportError:  # Optional C-accelerated ISO 8601 parser
+    ciso8601 = None
+
+try:
+    import orjson
+except ImportError:  # Optional C-accelerated JSON decoder
+    orjson = None
+
+
+# Threshold tables for the bisect-based lookups below. Each upper bound is
+# inclusive, so bisect_left maps a value to the bucket it falls into. NaN
+# compares false against every bound, which the original if-cascades sent to
+# the top bucket; the lookups check for it explicitly to keep that mapping.
+_SLOW_BINS = (SLOW_MEDIUM_THRESHOLD_MS, SLOW_HIGH_THRESHOLD_MS, SLOW_CRITICAL_THRESHOLD_MS)
+_SLOW_RESULTS = (
+    (None, None),
+    ("medium", SLOW_MEDIUM_THRESHOLD_MS),
+    ("high", SLOW_MEDIUM_THRESHOLD_MS),
+    ("critical", SLOW_MEDIUM_THRESHOLD_MS),
+)
 
-def parse_timestamp(timestamp_str: str) -> Optional[datetime]:
+_ERROR_RATE_BINS = (ERROR_RATE_MEDIUM_THRESHOLD, ERROR_RATE_HIGH_THRESHOLD, ERROR_RATE_CRITICAL_THRESHOLD)
+_ERROR_RATE_SEVERITIES = (None, "medium", "high", "critical")
+
+_MEM_BINS = (SMALL_RESPONSE_BYTES, MEDIUM_RESPONSE_BYTES)
+_MEM_COSTS = (MEMORY_COST_SMALL_USD, MEMORY_COST_MEDIUM_USD, MEMORY_COST_LARGE_USD)
+
+
+def load_logs(path: str) -> List[Dict[str, Any]]:
     """
-    Safely parse an ISO 8601 timestamp.
+    Load a JSON array of log records from disk.
 
-    Returns:
-        A timezone-aware datetime in UTC, or None if invalid.
+    Uses orjson when installed, otherwise the standard library json module.
     """
-    if not isinstance(timestamp_str, str):
-        return None
+    if orjson is not None:
+        with open(path, "rb") as f:
+            return orjson.loads(f.read())
+
+    import json
+
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
 
-    # Handle the common "Z" suffix for UTC
-    if timestamp_str.endswith("Z"):
-        timestamp_str = timestamp_str[:-1] + "+00:00"
 
+@lru_cache(maxsize=TIMESTAMP_CACHE_SIZE)
+def _parse_timestamp_cached(timestamp_str: str) -> Optional[datetime]:
+    """
+    Parse an ISO 8601 string into a UTC datetime, memoized on the raw string.
+
+    Log streams repeat timestamps heavily, and datetimes are immutable, so
+    identical strings are parsed only once.
+    """
+    # Both branches are C parsers. A pure-Python fast path for the fixed
+    # "YYYY-MM-DDTHH:MM:SSZ" shape (slicing + int()) measured roughly 10x
+    # slower than fromisoformat and 50x slower than ciso8601, so there is none.
     try:
-        dt = datetime.fromisoformat(timestamp_str)
+        if ciso8601 is not None:
+            # ciso8601 accepts the "Z" suffix natively
+            dt = ciso8601.parse_datetime(timestamp_str)
+        else:
+            # Handle the common "Z" suffix for UTC
+            if timestamp_str.endswith("Z"):
+                timestamp_str = timestamp_str[:-1] + "+00:00"
+            dt = datetime.fromisoformat(timestamp_str)
     except ValueError:
         return None
 
     # Ensure UTC
     if dt.tzinfo is None:
         dt = dt.replace(tzinfo=timezone.utc)
-    else:
+    elif dt.tzinfo is not timezone.utc:
         dt = dt.astimezone(timezone.utc)
 
     return dt
 
 
+def parse_timestamp(timestamp_str: str) -> Optional[datetime]:
+    """
+    Safely parse an ISO 8601 timestamp.
+
+    Results are cached per string; use ``parse_timestamp.cache_info()`` and
+    ``parse_timestamp.cache_clear()`` to inspect or reset the cache.
+
+    Returns:
+        A timezone-aware datetime in UTC, or None if invalid.
+    """
+    if not isinstance(timestamp_str, str):
+        return None
+    return _parse_timestamp_cached(timestamp_str)
+
+
+parse_timestamp.cache_info = _parse_timestamp_cached.cache_info
+parse_timestamp.cache_clear = _parse_timestamp_cached.cache_clear
+
+
+def format_timestamp(dt: datetime) -> str:
+    """
+    Format a UTC datetime as ISO 8601 with a "Z" suffix.
+
+    Built directly from the datetime fields instead of
+    ``isoformat().replace("+00:00", "Z")``; the output is identical.
+    """
+    if dt.microsecond:
+        return (
+            f"{dt.year:04d}-{dt.month:02d}-{dt.day:02d}T"
+            f"{dt.hour:02d}:{dt.minute:02d}:{dt.second:02d}.{dt.microsecond:06d}Z"
+        )
+    return (
+        f"{dt.year:04d}-{dt.month:02d}-{dt.day:02d}T"
+        f"{dt.hour:02d}:{dt.minute:02d}:{dt.second:02d}Z"
+    )
+
+
 def is_error_status(status_code: int) -> bool:
     """
     Decide whether a status code should be treated as an error.
@@ -70,26 +158,18 @@ def severity_from_response_time(avg_ms: float) -> Tuple[Optional[str], Optional[
     Returns:
         (severity, threshold_ms) or (None, None) if no issue.
     """
-    if avg_ms <= SLOW_MEDIUM_THRESHOLD_MS:
-        return None, None
-    if avg_ms <= SLOW_HIGH_THRESHOLD_MS:
-        return "medium", SLOW_MEDIUM_THRESHOLD_MS
-    if avg_ms <= SLOW_CRITICAL_THRESHOLD_MS:
-        return "high", SLOW_MEDIUM_THRESHOLD_MS
-    return "critical", SLOW_MEDIUM_THRESHOLD_MS
+    if isnan(avg_ms):
+        return _SLOW_RESULTS[-1]
+    return _SLOW_RESULTS[bisect_left(_SLOW_BINS, avg_ms)]
 
 
 def severity_from_error_rate(rate_pct: float) -> Optional[str]:
     """
     Map error rate percentage to severity string.
     """
-    if rate_pct <= ERROR_RATE_MEDIUM_THRESHOLD:
-        return None
-    if rate_pct <= ERROR_RATE_HIGH_THRESHOLD:
-        return "medium"
-    if rate_pct <= ERROR_RATE_CRITICAL_THRESHOLD:
-        return "high"
-    return "critical"
+    if isnan(rate_pct):
+        return _ERROR_RATE_SEVERITIES[-1]
+    return _ERROR_RATE_SEVERITIES[bisect_left(_ERROR_RATE_BINS, rate_pct)]
 
 
 def memory_cost_for_response_size(bytes_size: float) -> float:
@@ -98,33 +178,29 @@ def memory_cost_for_response_size(bytes_size: float) -> float:
     """
     if bytes_size < 0:
         return 0.0
-    if bytes_size <= SMALL_RESPONSE_BYTES:
-        return MEMORY_COST_SMALL_USD
-    if bytes_size <= MEDIUM_RESPONSE_BYTES:
-        return MEMORY_COST_MEDIUM_USD
-    return MEMORY_COST_LARGE_USD
+    if isnan(bytes_size):
+        return _MEM_COSTS[-1]
+    return _MEM_COSTS[bisect_left(_MEM_BINS, bytes_size)]
 
 
-def coefficient_of_variation(sum_x: float, sum_x2: float, n: int) -> float:
+def coefficient_of_variation(mean: float, m2: float, n: int) -> float:
     """
-    Compute coefficient of variation (std / mean) from aggregated stats.
+    Compute coefficient of variation (std / mean) from Welford running stats,
+    where m2 is the running sum of squared deviations from the mean.
 
     Returns 0.0 when not defined (e.g., n == 0 or mean == 0).
     """
-    if n <= 0:
-        return 0.0
-    mean = sum_x / n
-    if mean == 0:
+    if n <= 0 or mean == 0:
         return 0.0
-    variance = max((sum_x2 / n) - (mean ** 2), 0.0)
-    std_dev = sqrt(variance)
-    return std_dev / mean
+    # Welford's m2 is never negative, so no clamp is needed before sqrt
+    return sqrt(m2 / n) / mean
 
 
-def most_common_status(status_counts: Counter) -> Optional[int]:
+def most_common_status(status_counts: Dict[int, int]) -> Optional[int]:
     """
-    Safely compute most common status code from a Counter.
+    Safely compute most common status code from a mapping of counts.
     """
     if not status_counts:
         return None
-    return status_counts.most_common(1)[0][0]
+    # Top-1 only: max() avoids most_common()'s heap path; ties keep first-seen
+    return max(status_counts, key=status_counts.get)